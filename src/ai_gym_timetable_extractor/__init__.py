@@ -2,7 +2,17 @@
 
 __version__ = "0.1.0"
 
+# IMPORTANT: loads .env and sets up SSL, so it must run before the submodules below import google.genai
+from . import _ssl_bootstrap  # noqa: F401
+
+from dotenv import load_dotenv
+
 from .extractor import GymScheduleExtractor
-from .ocr_engine import OcrEngine, GeminiOcrEngine
+from .ocr_engine import OcrEngine, GeminiOcrEngine, get_default_ocr_engine
+
+__all__ = ["GymScheduleExtractor", "OcrEngine", "GeminiOcrEngine", "get_default_ocr_engine", "reload_env"]
+
 
-__all__ = ["GymScheduleExtractor", "OcrEngine", "GeminiOcrEngine"]
+def reload_env() -> bool:
+    """Re-read the .env file, overriding values already in the environment (useful for tests)."""
+    return load_dotenv(override=True)
@@ -0,0 +1,17 @@
+"""Point SSL verification at the certifi bundle before any HTTP library is imported.
+
+The .env file is loaded first (once per process), so CA settings in it take precedence.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+if not os.environ.get("SSL_CERT_FILE") or not os.environ.get("REQUESTS_CA_BUNDLE"):
+    import certifi
+
+    _ca_bundle = certifi.where()
+    os.environ.setdefault("SSL_CERT_FILE", _ca_bundle)
+    os.environ.setdefault("REQUESTS_CA_BUNDLE", _ca_bundle)
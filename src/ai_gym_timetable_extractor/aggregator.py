@@ -2,7 +2,9 @@ import logging
 from .parser import GymScheduleParser
 from .models import GymClass, GymSchedule
 from typing import List
+from concurrent.futures import ThreadPoolExecutor
 import os
+import orjson
 
 log = logging.getLogger(__name__)
 
@@ -26,12 +28,14 @@ class GymScheduleAggregator:
             log.warning(f"Directory {directory} does not exist")
             return all_classes
         
-        for filename in sorted(os.listdir(directory)):
-            if not filename.endswith('.json'):
-                continue
-            
-            classes = self.parser.parse(os.path.join(directory, filename))
-            all_classes.extend(classes)
+        with os.scandir(directory) as it:
+            paths = sorted(entry.path for entry in it if entry.name.endswith('.json') and entry.is_file())
+        
+        # Files are independent, so parse them in parallel; map() keeps the sorted order
+        with ThreadPoolExecutor(max_workers=min(32, len(paths) or 1)) as executor:
+            for classes in executor.map(self.parser.parse, paths):
+                # parse() logs and returns None for files it cannot read
+                all_classes.extend(classes or [])
         
         return all_classes
     
@@ -49,8 +53,8 @@ class GymScheduleAggregator:
         if dir_path:
             os.makedirs(dir_path, exist_ok=True)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            # Use model_dump_json for clean JSON output
-            f.write(schedule.model_dump_json(indent=2))
+        with open(output_path, 'wb') as f:
+            # orjson encodes large class lists much faster than Pydantic's JSON serializer
+            f.write(orjson.dumps(schedule.model_dump(mode="json"), option=orjson.OPT_INDENT_2))
         
         log.info(f"Saved {len(classes)} classes to {output_path}")
@@ -1,10 +1,10 @@
 """Command-line interface for the gym timetable extractor."""
 
 import argparse
+import asyncio
 import logging
 import os
 import sys
-from dotenv import load_dotenv
 
 log = logging.getLogger(__name__)
 
@@ -13,16 +13,18 @@ if __name__ == "__main__" and __package__ is None:
     # Add the parent directory to sys.path for direct execution
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from ai_gym_timetable_extractor.extractor import GymScheduleExtractor
-    from ai_gym_timetable_extractor.ocr_engine import GeminiOcrEngine
+    from ai_gym_timetable_extractor.ocr_engine import get_default_ocr_engine
     from ai_gym_timetable_extractor.aggregator import GymScheduleAggregator
     from ai_gym_timetable_extractor.database import get_database
     from ai_gym_timetable_extractor.web_app import start_server as start_web_server
+    from ai_gym_timetable_extractor.constants import ENV_GEMINI_CONCURRENCY, DEFAULT_GEMINI_CONCURRENCY, GEMINI_BATCH_SIZE
 else:
     from .extractor import GymScheduleExtractor
-    from .ocr_engine import GeminiOcrEngine
+    from .ocr_engine import get_default_ocr_engine
     from .aggregator import GymScheduleAggregator
     from .database import get_database
     from .web_app import start_server as start_web_server
+    from .constants import ENV_GEMINI_CONCURRENCY, DEFAULT_GEMINI_CONCURRENCY, GEMINI_BATCH_SIZE
 
 IMG_DIR = "data/img"
 JSON_DIR = "data/json"
@@ -56,23 +58,65 @@ def configure_logging(log_level: str = None, log_file: str = None):
         handlers=handlers
     )
 
+async def _extract_batch(sem: asyncio.Semaphore, extractor: GymScheduleExtractor, jobs: list):
+    """Extract a batch of images in one request and save the results, bounded by the shared semaphore."""
+    async with sem:
+        json_results = await asyncio.to_thread(extractor.extract_batch, [input_path for input_path, _ in jobs])
+        for (input_path, output_path), json_result in zip(jobs, json_results):
+            if isinstance(json_result, Exception):
+                log.error(f"Failed to process {input_path}: {json_result}")
+                continue
+            await asyncio.to_thread(extractor.save_to_file, json_result, output_path)
+            log.info(f"Processed {input_path} -> {output_path}")
+
+async def _extract_all(extractor: GymScheduleExtractor, batches: list, concurrency: int) -> list:
+    """Run all extraction batches concurrently, returning exceptions instead of raising them."""
+    sem = asyncio.Semaphore(concurrency)
+    tasks = [_extract_batch(sem, extractor, jobs) for jobs in batches]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+def _gemini_concurrency() -> int:
+    """Read GEMINI_CONCURRENCY, clamped to at least 1 so the semaphore can't block forever."""
+    value = os.getenv(ENV_GEMINI_CONCURRENCY, str(DEFAULT_GEMINI_CONCURRENCY))
+    try:
+        concurrency = int(value)
+    except ValueError:
+        raise ValueError(f"{ENV_GEMINI_CONCURRENCY} must be an integer, got {value!r}") from None
+    if concurrency < 1:
+        log.warning(f"{ENV_GEMINI_CONCURRENCY}={concurrency} is below 1, using 1")
+        concurrency = 1
+    return concurrency
+
 def batch_image_info_extraction(img_dir: str, output_dir: str):
-    """Batch process all images in the IMG_DIR and save results to OUTPUT_DIR."""
-    gemini_ocr_engine = GeminiOcrEngine()
-    extractor = GymScheduleExtractor(ocr_engine=gemini_ocr_engine)
+    """Batch process all images in img_dir and save results to output_dir.
+    
+    Images are grouped GEMINI_BATCH_SIZE at a time into a single Gemini request, and
+    batches run concurrently (up to GEMINI_CONCURRENCY at a time, default 8) since each
+    extraction is dominated by network round-trips to the Gemini API.
+    A failure in one batch is logged and does not abort the rest.
+    """
+    extractor = GymScheduleExtractor(ocr_engine=get_default_ocr_engine())
+    concurrency = _gemini_concurrency()
+    # Created once here so save_to_file doesn't re-check the directory for every image
+    os.makedirs(output_dir, exist_ok=True)
+    
+    jobs = []
+    with os.scandir(img_dir) as it:
+        for entry in it:
+            if not entry.is_file() or not entry.name.lower().endswith((".png", ".jpg", ".jpeg")):
+                continue
+            
+            output_filename = os.path.splitext(entry.name)[0] + ".json"
+            output_path = os.path.join(output_dir, output_filename)
+            jobs.append((entry.path, output_path))
     
     # Process images
-    for filename in os.listdir(IMG_DIR):
-        if not filename.lower().endswith((".png", ".jpg", ".jpeg")):
-            continue
-        
-        input_path = os.path.join(IMG_DIR, filename)
-        output_filename = os.path.splitext(filename)[0] + ".json"
-        output_path = os.path.join(JSON_DIR, output_filename)
-        
-        json_result = extractor.extract(input_path)
-        extractor.save_to_file(json_result, output_path)
-        log.info(f"Processed {input_path} -> {output_path}")
+    batches = [jobs[i:i + GEMINI_BATCH_SIZE] for i in range(0, len(jobs), GEMINI_BATCH_SIZE)]
+    results = asyncio.run(_extract_all(extractor, batches, concurrency))
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            failed = ", ".join(input_path for input_path, _ in batch)
+            log.error(f"Failed to process {failed}: {result}")
 
 def aggregate_results(output_dir: str, aggregated_output: str):
     """Aggregate all JSON results in OUTPUT_DIR into a single database-ready JSON file.
@@ -119,15 +163,23 @@ def main():
         default=8000,
         help='Port for web server (default: 8000)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes for the web server (default: 1); '
+             'more than 1 requires the package to be installed'
+    )
     
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
     
-    load_dotenv()
     configure_logging(log_level=args.log_level, log_file=args.log_file)
     
     # Start web server if --web flag is provided
     if args.web:
-        start_web_server(port=args.port)
+        start_web_server(port=args.port, workers=args.workers)
         return
     
     # Step 1: Batch extract from images
@@ -2,3 +2,22 @@
 
 ENV_GEMINI_API_KEY = "GEMINI_API_KEY"
 ENV_GEMINI_MODEL_NAME = "GEMINI_MODEL_NAME"
+ENV_GEMINI_CONCURRENCY = "GEMINI_CONCURRENCY"
+
+DEFAULT_GEMINI_CONCURRENCY = 8
+
+# Number of screenshots sent to Gemini in a single generate_content request
+GEMINI_BATCH_SIZE = 8
+
+# Raw image bytes sent inline per request; Gemini caps requests at 20 MB and
+# inline data is base64-encoded (4/3 larger), so leave room for the prompt
+GEMINI_INLINE_MAX_BYTES = 14 * 1024 * 1024
+
+ENV_OCR_CACHE_DIR = "GYM_OCR_CACHE_DIR"
+ENV_OCR_CACHE_SKIP = "GYM_OCR_CACHE_SKIP"
+ENV_OCR_PRESERVE_ORIGINAL = "GYM_OCR_PRESERVE_ORIGINAL"
+
+DEFAULT_OCR_CACHE_DIR = "~/.cache/ai_gym_timetable_extractor"
+
+# Long-edge size (px) screenshots are downscaled to before upload
+OCR_MAX_IMAGE_EDGE = 1024
@@ -1,5 +1,7 @@
+import operator
 import sqlite3
-import json
+import threading
+import orjson
 from pathlib import Path
 from typing import List, Optional, Union
 from datetime import datetime
@@ -11,16 +13,31 @@ if __name__ == "__main__":
 else:
     from .models import GymClass, GymSchedule
 
+# Rows bound per executemany call when upserting
+UPSERT_BATCH_SIZE = 10_000
+
+# Kept as a constant so sqlite3's prepared-statement cache always sees the same SQL text
+UPSERT_SQL = (
+    'INSERT OR REPLACE INTO gym_classes '
+    '(date, day_of_week, timeslot, activity, venue, class_type, vacancy, modified_at) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+)
+
+# Extracts the UPSERT_SQL columns (except modified_at) from a GymClass in one C-level call
+_UPSERT_FIELDS = operator.attrgetter('date', 'day_of_week', 'timeslot', 'activity', 'venue', 'class_type', 'vacancy')
+
 
 class GymScheduleDatabase:
     """Singleton database for managing gym schedule data with SQL query support."""
     
     _instance: Optional['GymScheduleDatabase'] = None
     _initialized: bool = False
+    _instance_lock = threading.Lock()
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
         return cls._instance
     
     def __init__(self, db_path: Optional[str | Path] = None):
@@ -29,12 +46,17 @@ class GymScheduleDatabase:
         Args:
             db_path: Path to the SQLite database file. If None, defaults to data/db/gym_schedule.db
         """
-        if not GymScheduleDatabase._initialized:
-            self.conn: Optional[sqlite3.Connection] = None
-            self.cursor: Optional[sqlite3.Cursor] = None
-            self.db_path = self._get_db_path(db_path)
-            self._create_database()
-            GymScheduleDatabase._initialized = True
+        with GymScheduleDatabase._instance_lock:
+            if not GymScheduleDatabase._initialized:
+                # One connection per thread so FastAPI's worker threads don't share cursor state;
+                # writes still go through a single lock to keep SQLite's single-writer model
+                self._local = threading.local()
+                self._connections: List[sqlite3.Connection] = []
+                self._connections_lock = threading.Lock()
+                self._write_lock = threading.Lock()
+                self.db_path = self._get_db_path(db_path)
+                self._create_database()
+                GymScheduleDatabase._initialized = True
     
     def _get_db_path(self, db_path: Optional[str | Path] = None) -> Path:
         """Get the database file path, creating directories if needed.
@@ -62,14 +84,37 @@ class GymScheduleDatabase:
         
         return db_path
     
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening and tuning it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can close every thread's connection
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, cached_statements=256)
+            conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
+            
+            # WAL (set in _create_database) + synchronous=NORMAL avoids an fsync per commit
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            conn.execute('PRAGMA mmap_size=268435456')  # 256 MiB
+            conn.execute('PRAGMA cache_size=-65536')  # 64 MiB
+            conn.execute('PRAGMA busy_timeout=5000')
+            # INSERT OR REPLACE only fires the FTS delete trigger with recursive triggers on
+            conn.execute('PRAGMA recursive_triggers=ON')
+            
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
     def _create_database(self):
         """Create a SQLite database and set up the schema."""
-        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
-        self.cursor = self.conn.cursor()
+        conn = self._conn()
         
+        # WAL is persistent in the database file and lets readers run alongside the writer
+        conn.execute('PRAGMA journal_mode=WAL')
+
         # Create the gym_classes table based on GymClass model
-        self.cursor.execute('''
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS gym_classes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 date TEXT NOT NULL,
@@ -85,12 +130,47 @@ class GymScheduleDatabase:
         ''')
         
         # Create indexes for common query patterns
-        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_date ON gym_classes(date)')
-        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_activity ON gym_classes(activity)')
-        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_day_of_week ON gym_classes(day_of_week)')
-        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeslot ON gym_classes(timeslot)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_date ON gym_classes(date)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_activity ON gym_classes(activity)')
+        # Day names are matched case-insensitively, so index them under NOCASE
+        conn.execute('DROP INDEX IF EXISTS idx_day_of_week')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_day_of_week_nocase ON gym_classes(day_of_week COLLATE NOCASE)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_timeslot ON gym_classes(timeslot)')
         
-        self.conn.commit()
+        # Trigram full-text index over activity names, kept in sync with gym_classes by triggers;
+        # trigrams give case-insensitive substring matches ("pump" finds "BodyPump")
+        fts = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'gym_classes_fts'"
+        ).fetchone()
+        if fts is not None and 'trigram' not in fts[0]:
+            # Index from an older schema with the default word tokenizer; recreate it below
+            conn.execute('DROP TABLE gym_classes_fts')
+            fts = None
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS gym_classes_fts
+            USING fts5(activity, tokenize='trigram', content='gym_classes', content_rowid='id')
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS gym_classes_fts_ai AFTER INSERT ON gym_classes BEGIN
+                INSERT INTO gym_classes_fts(rowid, activity) VALUES (new.id, new.activity);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS gym_classes_fts_ad AFTER DELETE ON gym_classes BEGIN
+                INSERT INTO gym_classes_fts(gym_classes_fts, rowid, activity) VALUES ('delete', old.id, old.activity);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS gym_classes_fts_au AFTER UPDATE OF activity ON gym_classes BEGIN
+                INSERT INTO gym_classes_fts(gym_classes_fts, rowid, activity) VALUES ('delete', old.id, old.activity);
+                INSERT INTO gym_classes_fts(rowid, activity) VALUES (new.id, new.activity);
+            END
+        ''')
+        if fts is None:
+            # Index rows written before the FTS table existed
+            conn.execute("INSERT INTO gym_classes_fts(gym_classes_fts) VALUES ('rebuild')")
+        
+        conn.commit()
     
     def load_delta(self, source: Union[GymSchedule, List[GymClass]]) -> int:
         """
@@ -119,43 +199,68 @@ class GymScheduleDatabase:
                 "Expected GymSchedule or List[GymClass]"
             )
         
-        # Upsert all classes (INSERT OR REPLACE)
-        records_loaded = 0
-        for gym_class in classes:
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO gym_classes 
-                (date, day_of_week, timeslot, activity, venue, class_type, vacancy, modified_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                gym_class.date,
-                gym_class.day_of_week,
-                gym_class.timeslot,
-                gym_class.activity,
-                gym_class.venue,
-                gym_class.class_type,
-                gym_class.vacancy,
-                gym_class.modified_at.isoformat() if gym_class.modified_at else datetime.now().isoformat()
-            ))
-            records_loaded += 1
+        # One timestamp for the whole batch instead of a datetime.now() per row
+        now_iso = datetime.now().isoformat()
+        rows = [
+            (*_UPSERT_FIELDS(gym_class), gym_class.modified_at.isoformat() if gym_class.modified_at else now_iso)
+            for gym_class in classes
+        ]
         
-        self.conn.commit()
-        return records_loaded
+        return self._upsert_rows(rows)
     
     def load_delta_from_json_file(self, json_path: str | Path) -> int:
-        if isinstance(json_path, (str, Path)):
-            # Load from file
-            json_path = Path(json_path)
-            if not json_path.exists():
-                raise FileNotFoundError(f"JSON file not found: {json_path}")
-            
-            with open(json_path, 'r') as f:
-                data = json.load(f)
+        """
+        Load an aggregated schedule JSON file into the database (same upsert as load_delta).
+        
+        The file is written by GymScheduleAggregator from already-validated models, so rows
+        go straight from the parsed JSON into SQLite without rebuilding Pydantic models.
+        
+        Args:
+            json_path: Path to a JSON file with a top-level 'classes' list
             
-            # Validate and parse using Pydantic model
-            schedule = GymSchedule(**data)
-            classes = schedule.classes
+        Returns:
+            Number of records loaded/updated
+        """
+        json_path = Path(json_path)
+        if not json_path.exists():
+            raise FileNotFoundError(f"JSON file not found: {json_path}")
+        
+        with open(json_path, 'rb') as f:
+            data = orjson.loads(f.read())
         
-        return self.load_delta(classes)
+        if not isinstance(data, dict) or not isinstance(data.get('classes'), list):
+            raise ValueError(f"Invalid schedule file {json_path}: expected a top-level 'classes' list")
+        
+        now_iso = datetime.now().isoformat()
+        try:
+            rows = [
+                (
+                    d['date'],
+                    d['day_of_week'],
+                    d['timeslot'],
+                    d['activity'],
+                    d['venue'],
+                    d['class_type'],
+                    int(d['vacancy']),
+                    d.get('modified_at') or now_iso
+                )
+                for d in data['classes']
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid class record in {json_path}: {e!r}") from e
+        
+        return self._upsert_rows(rows)
+    
+    def _upsert_rows(self, rows: List[tuple]) -> int:
+        """Upsert prepared row tuples (INSERT OR REPLACE) in a single transaction."""
+        conn = self._conn()
+        with self._write_lock, conn:
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                conn.executemany(UPSERT_SQL, rows[start:start + UPSERT_BATCH_SIZE])
+        
+        return len(rows)
     
     def query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
         """
@@ -168,8 +273,7 @@ class GymScheduleDatabase:
         Returns:
             List of rows as sqlite3.Row objects (dict-like access)
         """
-        self.cursor.execute(sql, params)
-        return self.cursor.fetchall()
+        return self._conn().execute(sql, params).fetchall()
     
     def query_as_dict(self, sql: str, params: tuple = ()) -> List[dict]:
         """
@@ -196,15 +300,16 @@ class GymScheduleDatabase:
         Returns:
             List of GymClass model instances
         """
-        rows = self.query_as_dict(sql, params)
         gym_classes = []
-        for row in rows:
+        for row in self.query(sql, params):
+            data = dict(row)
             # Remove the 'id' field as it's not part of GymClass model
-            row.pop('id', None)
+            data.pop('id', None)
             # Convert modified_at string back to datetime
-            if 'modified_at' in row and row['modified_at']:
-                row['modified_at'] = datetime.fromisoformat(row['modified_at'])
-            gym_classes.append(GymClass(**row))
+            if data.get('modified_at'):
+                data['modified_at'] = datetime.fromisoformat(data['modified_at'])
+            # Rows were validated on the way in and are typed by the schema, so skip re-validation
+            gym_classes.append(GymClass.model_construct(**data))
         return gym_classes
     
     def execute(self, sql: str, params: tuple = ()) -> int:
@@ -218,9 +323,11 @@ class GymScheduleDatabase:
         Returns:
             Number of rows affected
         """
-        self.cursor.execute(sql, params)
-        self.conn.commit()
-        return self.cursor.rowcount
+        conn = self._conn()
+        with self._write_lock:
+            cursor = conn.execute(sql, params)
+            conn.commit()
+        return cursor.rowcount
     
     def get_all_classes(self) -> List[GymClass]:
         """Get all gym classes as GymClass model instances."""
@@ -234,17 +341,32 @@ class GymScheduleDatabase:
         )
     
     def get_classes_by_activity(self, activity: str) -> List[GymClass]:
-        """Get all classes for a specific activity."""
+        """Get all classes whose activity contains the given text (case-insensitive)."""
+        if len(activity) < 3:
+            # The trigram index can't match fewer than three characters; scan with LIKE instead
+            pattern = '%' + activity.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            return self.query_as_models(
+                "SELECT * FROM gym_classes WHERE activity LIKE ? ESCAPE '\\' ORDER BY date, timeslot",
+                (pattern,)
+            )
+        
+        # Quote as an FTS5 phrase so user input can't inject query syntax
+        phrase = '"' + activity.replace('"', '""') + '"'
         return self.query_as_models(
-            'SELECT * FROM gym_classes WHERE activity LIKE ? ORDER BY date, timeslot',
-            (f'%{activity}%',)
+            '''
+            SELECT gc.* FROM gym_classes gc
+            JOIN gym_classes_fts f ON f.rowid = gc.id
+            WHERE gym_classes_fts MATCH ?
+            ORDER BY gc.date, gc.timeslot
+            ''',
+            (phrase,)
         )
     
     def get_classes_by_day_of_week(self, day: str) -> List[GymClass]:
-        """Get all classes for a specific day of the week."""
+        """Get all classes for a specific day of the week (case-insensitive)."""
         return self.query_as_models(
-            'SELECT * FROM gym_classes WHERE day_of_week LIKE ? ORDER BY timeslot',
-            (f'%{day}%',)
+            'SELECT * FROM gym_classes WHERE day_of_week = ? COLLATE NOCASE ORDER BY timeslot',
+            (day,)
         )
     
     def get_classes_with_vacancy(self, min_vacancy: int = 1) -> List[GymClass]:
@@ -255,16 +377,17 @@ class GymScheduleDatabase:
         )
     
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
-            self.cursor = None
+        """Close the database connections of all threads."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
     
     @classmethod
     def reset_instance(cls):
         """Reset the singleton instance (useful for testing)."""
-        if cls._instance and cls._instance.conn:
+        if cls._instance and cls._initialized:
             cls._instance.close()
         cls._instance = None
         cls._initialized = False
@@ -1,7 +1,7 @@
 """Main extractor class for gym schedule extraction."""
 
+import gzip
 import logging
-import os
 from typing import Optional
 from .ocr_engine import OcrEngine
 
@@ -20,9 +20,25 @@ class GymScheduleExtractor:
             raise ValueError("OCR engine is required for extraction")
         return self.ocr_engine.extract_image_as_json(image_path)
 
-    def save_to_file(self, content, output_path):
-        """Saves content to a file."""
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(content)
+    def extract_batch(self, image_paths):
+        """Extract schedules from several images, one result per image in order.
+        
+        A failed image's result is the exception raised for it rather than a JSON string.
+        """
+        if self.ocr_engine is None:
+            raise ValueError("OCR engine is required for extraction")
+        return self.ocr_engine.extract_images_as_json(image_paths)
+
+    def save_to_file(self, content, output_path, compressed=False):
+        """Saves content to a file, gzip-compressed to output_path + '.gz' if compressed is True.
+        
+        The output directory must already exist; batch callers create it once up front.
+        """
+        if compressed:
+            output_path += ".gz"
+            with gzip.open(output_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                f.write(content)
+        else:
+            with open(output_path, "w", encoding="utf-8") as f:
+                f.write(content)
         log.info(f"Saved extracted JSON to {output_path}")
@@ -1,10 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 from datetime import datetime
 
 
-class GymClass(BaseModel):
-    """Represents a single gym class with all relevant details."""
+class GymClassBase(BaseModel):
+    """Fields shared by the stored gym class and the one requested from the OCR model."""
     date: str = Field(..., description="Date of the class (e.g., 'YYYY-MM-DD')")
     day_of_week: str = Field(..., description="Day of week (e.g., 'Monday')")
     timeslot: str = Field(..., description="Time slot (e.g., '10:00')")
@@ -12,14 +12,48 @@ class GymClass(BaseModel):
     venue: str = Field(..., description="Venue/location of the class")
     class_type: str = Field(..., description="Type of class (e.g., 'Group', 'Personal')")
     vacancy: int = Field(..., description="Number of available spots")
+
+
+class GymClass(GymClassBase):
+    """Represents a single gym class with all relevant details."""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     modified_at: Optional[datetime] = Field(default_factory=datetime.now, description="Last modification timestamp")
 
 
+class GymClassWire(GymClassBase):
+    """A gym class as requested from the OCR model, without server-side fields like modified_at.
+    
+    Only the model's output is held to the YYYY-MM-DD date format; stored classes are not.
+    """
+    date: str = Field(..., description="Date of the class (e.g., 'YYYY-MM-DD')", pattern=r"^\d{4}-\d{2}-\d{2}$")
+
+
 class GymSchedule(BaseModel):
     """Represents a collection of gym classes."""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     classes: List[GymClass] = Field(..., description="List of gym classes in the schedule")
 
 
+class GymScheduleWire(BaseModel):
+    """Response schema for extracting a single screenshot."""
+    classes: List[GymClassWire] = Field(..., description="List of gym classes in the schedule")
+
+    def to_schedule(self, modified_at: Optional[datetime] = None) -> GymSchedule:
+        """Convert to a GymSchedule, stamping every class with the same modification time."""
+        modified_at = modified_at or datetime.now()
+        return GymSchedule(classes=[
+            GymClass(**wire_class.model_dump(), modified_at=modified_at)
+            for wire_class in self.classes
+        ])
+
+
+class GymScheduleBatch(BaseModel):
+    """Response schema for extracting several screenshots, in input order."""
+    schedules: List[GymScheduleWire] = Field(..., description="One schedule per screenshot, in the given order")
+
+
 if __name__ == "__main__":
     # Example usage
     example_class = GymClass(
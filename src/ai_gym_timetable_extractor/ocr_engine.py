@@ -1,22 +1,131 @@
 """OCR Engine implementations for extracting text from images."""
 
+import functools
+import hashlib
+import io
 import logging
+import mimetypes
 import os
-import certifi
+import shelve
+import tempfile
+import threading
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union, cast
 
-from .models import GymSchedule
+import orjson
+from PIL import Image
+from pydantic import ValidationError
 
-# IMPORTANT: Set SSL environment variables before importing google.genai
-# This forces the library to use the certifi bundle for SSL verification
-os.environ["SSL_CERT_FILE"] = certifi.where()
-os.environ["REQUESTS_CA_BUNDLE"] = certifi.where()
+from .models import GymSchedule, GymScheduleWire, GymScheduleBatch
+
+# SSL_CERT_FILE / REQUESTS_CA_BUNDLE are set by the package's _ssl_bootstrap on import
 from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types
 
-from .constants import ENV_GEMINI_API_KEY, ENV_GEMINI_MODEL_NAME
+from .constants import (
+    ENV_GEMINI_API_KEY,
+    ENV_GEMINI_MODEL_NAME,
+    ENV_OCR_CACHE_DIR,
+    ENV_OCR_CACHE_SKIP,
+    ENV_OCR_PRESERVE_ORIGINAL,
+    DEFAULT_OCR_CACHE_DIR,
+    OCR_MAX_IMAGE_EDGE,
+    GEMINI_INLINE_MAX_BYTES,
+)
 
 log = logging.getLogger(__name__)
 
+# An image's extracted JSON, or the exception that prevented extracting it
+OcrResult = Union[str, Exception]
+
+# Serializes access to the upload-handle shelf across threads and engine instances
+_upload_cache_lock = threading.Lock()
+
+
+def _schedule_to_json(schedule: GymSchedule) -> str:
+    """Serialize an extracted schedule to the indented JSON written to disk."""
+    return orjson.dumps(schedule.model_dump(mode="json"), option=orjson.OPT_INDENT_2).decode()
+
+
+def _cache_dir() -> str:
+    """Resolve the on-disk cache directory from GYM_OCR_CACHE_DIR."""
+    return os.path.expanduser(os.environ.get(ENV_OCR_CACHE_DIR, DEFAULT_OCR_CACHE_DIR))
+
+
+def _read_image(path: str) -> Tuple[bytes, str]:
+    """Read an image and return (bytes, SHA-256 hex digest), so callers hash it only once."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def _image_variant() -> str:
+    """Which form of the image is sent to Gemini: the original or a downscaled copy."""
+    if os.environ.get(ENV_OCR_PRESERVE_ORIGINAL) == "1":
+        return "original"
+    return f":{OCR_MAX_IMAGE_EDGE}"
+
+
+def _result_cache_path(image_sha256: str, model_name: Optional[str]) -> str:
+    """Cache file for an image's OCR result, keyed by image bytes, model name and image variant."""
+    digest = hashlib.sha256(image_sha256.encode())
+    digest.update((model_name or "").encode())
+    digest.update(_image_variant().encode())
+    return os.path.join(_cache_dir(), f"{digest.hexdigest()}.json")
+
+
+def _read_cached_result(cache_path: str) -> Optional[str]:
+    """Return a cached OCR result, or None on a miss or when GYM_OCR_CACHE_SKIP=1."""
+    if os.environ.get(ENV_OCR_CACHE_SKIP) == "1" or not os.path.exists(cache_path):
+        return None
+    with open(cache_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _write_cached_result(cache_path: str, result: str):
+    """Atomically store an OCR result so concurrent readers never see a partial entry."""
+    # A failed write only loses the cache entry, never the (already paid for) result
+    cache_dir = os.path.dirname(cache_path)
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(result)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        log.warning(f"Failed to write OCR cache entry {cache_path}: {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def cache_by_image_content(func):
+    """Cache an engine's JSON output on disk, keyed by image bytes, model name and image variant.
+    
+    The cache lives in GYM_OCR_CACHE_DIR (default ~/.cache/ai_gym_timetable_extractor).
+    Pass force=True, or set GYM_OCR_CACHE_SKIP=1, to bypass the lookup and refresh the entry.
+    The image is read once and handed to the wrapped method as image=(bytes, sha256 hex);
+    callers that already read it can pass the same tuple.
+    """
+    @functools.wraps(func)
+    def wrapper(self, image_path: str, force: bool = False,
+                image: Optional[Tuple[bytes, str]] = None) -> str:
+        image = image or _read_image(image_path)
+        cache_path = _result_cache_path(image[1], self.model_name)
+        if not force:
+            cached = _read_cached_result(cache_path)
+            if cached is not None:
+                log.info(f"Using cached OCR result for {image_path}")
+                return cached
+        
+        result = func(self, image_path, image=image)
+        _write_cached_result(cache_path, result)
+        return result
+    return wrapper
+
+
 class OcrEngine:
     """Base class for OCR engines."""
     
@@ -27,6 +136,19 @@ class OcrEngine:
         """Extract text from image and return as JSON string."""
         pass
 
+    def extract_images_as_json(self, image_paths: List[str]) -> List[OcrResult]:
+        """Extract several images, returning one result per image in the same order.
+        
+        A failed image gets the exception raised for it, so it can't hide the others' results.
+        """
+        results: List[OcrResult] = []
+        for image_path in image_paths:
+            try:
+                results.append(self.extract_image_as_json(image_path))
+            except Exception as e:
+                results.append(e)
+        return results
+
 
 class GeminiOcrEngine(OcrEngine):
     """OCR engine using Google's Gemini API."""
@@ -39,33 +161,227 @@ class GeminiOcrEngine(OcrEngine):
         
         self.model_name = os.environ.get(ENV_GEMINI_MODEL_NAME)
         self.client = genai.Client(api_key=self.api_key)
+        
+        # Maps image content hash -> Gemini file name, so retries reuse live uploads
+        self._upload_cache_path = os.path.join(_cache_dir(), "uploads")
 
-    def extract_image_as_json(self, image_path: str) -> str:
+    def _load_image(self, image_path: str,
+                    image: Optional[Tuple[bytes, str]] = None) -> Tuple[str, bytes, str]:
+        """Return (upload cache key, request bytes, mime type) for an image.
+        
+        image is the (bytes, sha256 hex) pair from _read_image when the caller already read it.
+        The image is downscaled unless GYM_OCR_PRESERVE_ORIGINAL=1; the cache key covers
+        both the original bytes and the variant so the two never share an upload.
+        """
+        data, key = image or _read_image(image_path)
+        variant = _image_variant()
+        if variant == "original":
+            return key, data, mimetypes.guess_type(image_path)[0] or "image/png"
+        return f"{key}{variant}", self._downscale(data), "image/jpeg"
+
+    def _upload(self, image_path: str, key: str, body: bytes, mime_type: str):
+        """Upload an image via the Files API, reusing a previous upload when still available."""
+        # The shelf only saves re-uploads, so an unusable cache directory must not fail extraction
+        file_name = None
+        try:
+            os.makedirs(os.path.dirname(self._upload_cache_path), exist_ok=True)
+            with _upload_cache_lock, shelve.open(self._upload_cache_path) as shelf:
+                file_name = shelf.get(key)
+        except OSError as e:
+            log.warning(f"Failed to read upload cache {self._upload_cache_path}: {e}")
+        
+        if file_name is not None:
+            try:
+                return self.client.files.get(name=file_name)
+            except genai_errors.ClientError as e:
+                # Uploaded files expire after ~48h; fall through and upload again
+                log.debug(f"Cached upload {file_name} unavailable ({e}), re-uploading")
+        
+        my_file = self.client.files.upload(
+            file=io.BytesIO(body),
+            config={
+                "mime_type": mime_type,
+                "display_name": os.path.basename(image_path),
+            }
+        )
+        try:
+            with _upload_cache_lock, shelve.open(self._upload_cache_path) as shelf:
+                shelf[key] = my_file.name
+        except OSError as e:
+            log.warning(f"Failed to write upload cache {self._upload_cache_path}: {e}")
+        return my_file
+
+    def _load_images(self, image_paths: List[str],
+                     images: List[Tuple[bytes, str]]) -> List[Union[Tuple[str, bytes, str], Exception]]:
+        """Load images concurrently (see _load_image); a failure is returned in place of its image."""
+        def load(image_path: str, image: Tuple[bytes, str]) -> Union[Tuple[str, bytes, str], Exception]:
+            try:
+                return self._load_image(image_path, image)
+            except Exception as e:  # e.g. PIL.UnidentifiedImageError for a corrupt screenshot
+                return e
+        
+        with ThreadPoolExecutor(max_workers=len(image_paths)) as pool:
+            return list(pool.map(load, image_paths, images))
+
+    def _image_parts(self, image_paths: List[str], loaded: List[Tuple[str, bytes, str]]) -> list:
+        """Build request contents for loaded images: inline bytes while they fit, Files API uploads otherwise.
+        
+        Inline data saves the separate upload round-trip, but the whole request is capped,
+        so images beyond GEMINI_INLINE_MAX_BYTES in total fall back to uploads.
+        """
+        parts: list = [None] * len(loaded)
+        to_upload = []
+        inline_bytes = 0
+        for i, (image_path, (key, body, mime_type)) in enumerate(zip(image_paths, loaded)):
+            if inline_bytes + len(body) <= GEMINI_INLINE_MAX_BYTES:
+                parts[i] = types.Part.from_bytes(data=body, mime_type=mime_type)
+                inline_bytes += len(body)
+            else:
+                to_upload.append((i, image_path, key, body, mime_type))
+        
+        if to_upload:
+            with ThreadPoolExecutor(max_workers=len(to_upload)) as pool:
+                uploaded = pool.map(lambda job: self._upload(*job[1:]), to_upload)
+                for (i, *_), my_file in zip(to_upload, uploaded):
+                    parts[i] = my_file
+        return parts
+
+    @staticmethod
+    def _downscale(data: bytes) -> bytes:
+        """Shrink an image to OCR_MAX_IMAGE_EDGE on its long edge and re-encode as JPEG.
+        
+        Gemini resizes images server-side anyway, so full-resolution screenshots only
+        cost extra upload bytes and image tokens.
+        """
+        with Image.open(io.BytesIO(data)) as im:
+            im.thumbnail((OCR_MAX_IMAGE_EDGE, OCR_MAX_IMAGE_EDGE), Image.Resampling.LANCZOS)
+            buf = io.BytesIO()
+            im.convert("RGB").save(buf, "JPEG", quality=85, optimize=True)
+        return buf.getvalue()
+
+    def _build_prompt(self) -> str:
+        """Instructions shared by single and batched extraction requests."""
+        today = datetime.date.today().isoformat()
+        return ("This is a screenshot of my gym timetable. Extract out "  +
+                "the schedule details, including date, day of week, "     +
+                "timeslot, activity, venue, class type, and vacancy for " +
+                f"each class. Date should be in a near future of {today} " +
+                "and formatted as 'YYYY-MM-DD'.")
+
+    @cache_by_image_content
+    def extract_image_as_json(self, image_path: str,
+                              image: Optional[Tuple[bytes, str]] = None) -> str:
         """Extract gym timetable from image using Gemini API."""
-        my_file = self.client.files.upload(file=image_path)
+        image_part, = self._image_parts([image_path], [self._load_image(image_path, image)])
 
         log.info("Sending OCR request to Gemini API...")
-        today = datetime.date.today().isoformat()
         response = self.client.models.generate_content(
             model=self.model_name,
-            contents=[
-                my_file, 
-                "This is a screenshot of my gym timetable. Extract out "  +
-                "the schedule details, including date, day of week, "     + 
-                "timeslot, activity, venue, class type, and vacancy for " +
-                f"each class. Date should be in a near future of {today} " +
-                "and formatted as 'YYYY-MM-DD'."],
+            contents=[image_part, self._build_prompt()],
                 config={
                     "response_mime_type": "application/json",
-                    "response_schema": GymSchedule,
+                    "response_schema": GymScheduleWire,
                 }
         )
-        return self.clean_up_json_markdown(response.text)
-    
-    def clean_up_json_markdown(self, text):
-        """Cleans up markdown code blocks from JSON text."""
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
-        return text.strip()
+        # The SDK already validates against response_schema; only re-parse if it could not
+        wire = response.parsed
+        if not isinstance(wire, GymScheduleWire):
+            wire = GymScheduleWire.model_validate_json(response.text)
+        return _schedule_to_json(wire.to_schedule())
+
+    def extract_images_as_json(self, image_paths: List[str]) -> List[OcrResult]:
+        """Extract several screenshots with a single Gemini request.
+        
+        Cached images are served from disk; the rest are sent together so the prompt
+        and round-trip are paid once per batch. Images that can't be read or decoded
+        are left out of the request, and if the request fails or does not return
+        exactly one schedule per image, each image is retried on its own. A failed
+        image's result is the exception raised for it.
+        """
+        results: List[Optional[OcrResult]] = [None] * len(image_paths)
+        misses = []
+        for i, image_path in enumerate(image_paths):
+            try:
+                image = _read_image(image_path)
+            except OSError as e:
+                results[i] = e
+                continue
+            cache_path = _result_cache_path(image[1], self.model_name)
+            results[i] = _read_cached_result(cache_path)
+            if results[i] is None:
+                misses.append((i, image_path, cache_path, image))
+            else:
+                log.info(f"Using cached OCR result for {image_path}")
+        
+        if len(misses) > 1:
+            loaded = self._load_images([miss[1] for miss in misses], [miss[3] for miss in misses])
+            for (i, image_path, _, _), load_result in zip(misses, loaded):
+                if isinstance(load_result, Exception):
+                    log.warning(f"Skipping unreadable image {image_path}: {load_result}")
+                    results[i] = load_result
+            batch_jobs = [
+                (miss, load_result) for miss, load_result in zip(misses, loaded)
+                if not isinstance(load_result, Exception)
+            ]
+            if len(batch_jobs) > 1:
+                misses = self._extract_batch_request(batch_jobs, results)
+            else:
+                misses = [miss for miss, _ in batch_jobs]
+        
+        # Single misses, and every image of a failed batch, get their own request
+        for i, image_path, _, image in misses:
+            try:
+                results[i] = self.extract_image_as_json(image_path, force=True, image=image)
+            except Exception as e:
+                log.error(f"OCR failed for {image_path}: {e}")
+                results[i] = e
+        
+        # Every slot was filled from the cache, a response or the error for that image
+        assert None not in results
+        return cast(List[OcrResult], results)
+
+    def _extract_batch_request(self, batch_jobs: list, results: List[Optional[OcrResult]]) -> list:
+        """Send loaded images in one request, storing each schedule into results.
+        
+        Returns the misses still to extract one by one: none on success, all of them if the
+        request failed or its response could not be split into one schedule per image.
+        """
+        misses = [miss for miss, _ in batch_jobs]
+        try:
+            image_parts = self._image_parts([miss[1] for miss in misses], [loaded for _, loaded in batch_jobs])
+            
+            log.info(f"Sending batched OCR request for {len(image_parts)} images to Gemini API...")
+            response = self.client.models.generate_content(
+                model=self.model_name,
+                contents=[
+                    *image_parts,
+                    self._build_prompt() + f" There are {len(image_parts)} screenshots. Return a " +
+                    f"'schedules' array of length {len(image_parts)}, one schedule per image " +
+                    "in the given order."],
+                config={
+                    "response_mime_type": "application/json",
+                    "response_schema": GymScheduleBatch,
+                }
+            )
+            # The SDK already validates against response_schema; only re-parse if it could not
+            batch = response.parsed
+            if not isinstance(batch, GymScheduleBatch):
+                batch = GymScheduleBatch.model_validate_json(response.text)
+            if len(batch.schedules) != len(misses):
+                raise ValueError(f"expected {len(misses)} schedules, got {len(batch.schedules)}")
+        except (genai_errors.APIError, ValidationError, ValueError, OSError) as e:
+            log.warning(f"Batched OCR request failed ({e}), falling back to per-image requests")
+            return misses
+        
+        now = datetime.datetime.now()
+        for (i, _, cache_path, _), wire in zip(misses, batch.schedules):
+            result = _schedule_to_json(wire.to_schedule(modified_at=now))
+            _write_cached_result(cache_path, result)
+            results[i] = result
+        return []
+
+
+@functools.lru_cache(maxsize=1)
+def get_default_ocr_engine() -> GeminiOcrEngine:
+    """Get the shared GeminiOcrEngine, so one genai.Client (and its connection pool) is reused."""
+    return GeminiOcrEngine()
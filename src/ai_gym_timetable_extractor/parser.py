@@ -1,6 +1,6 @@
 import logging
 from typing import List
-import json
+from pydantic import ValidationError
 from .models import GymSchedule
 from .models import GymClass
 
@@ -9,15 +9,9 @@ log = logging.getLogger(__name__)
 class GymScheduleParser:
     def parse(self, filepath: str) -> List[GymClass]:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            all_classes: List[GymClass] = []
-
-            if 'classes' in data:
-                schedule = GymSchedule(**data)
-                all_classes.extend(schedule.classes)
-            return all_classes
+            # Parse and validate in a single pass instead of json.load + GymSchedule(**data)
+            with open(filepath, 'rb') as f:
+                return GymSchedule.model_validate_json(f.read()).classes
 
             # Parse the schedule
             # if 'classes' in data:
@@ -38,5 +32,5 @@ class GymScheduleParser:
             #         else:
             #             log.info(f"Duplicate found: {gym_class.activity} on {gym_class.date} at {gym_class.timeslot}")
                         
-        except Exception as e:
+        except (OSError, ValidationError) as e:
             log.error(f"Error processing {filepath}: {e}")
\ No newline at end of file
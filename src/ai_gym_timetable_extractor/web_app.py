@@ -1,21 +1,27 @@
 """Web application for uploading gym screenshots from mobile devices."""
 
+import functools
+import hashlib
 import logging
+import os
 import socket
-import subprocess
+import uuid
 from pathlib import Path
-from datetime import datetime
-from typing import List
+from typing import List, Optional
 
+import aiofiles
 from fastapi import FastAPI, UploadFile, File, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
 import uvicorn
 
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="Gym Screenshot Uploader")
+app = FastAPI(title="Gym Screenshot Uploader", default_response_class=ORJSONResponse)
+# Compress larger responses (e.g. long upload results) for phones on slow networks
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # Setup directories
 UPLOAD_DIR = Path("data/img")
@@ -26,37 +32,41 @@ TEMPLATES_DIR.mkdir(exist_ok=True)
 
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
+# Uploads are streamed to disk in chunks, and files over the size limit are rejected
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+MAX_UPLOAD_SIZE = 50 << 20  # 50 MiB
+
+# ISO-BMFF brands used by HEIC/HEIF photos (bytes 8-12, after the 'ftyp' box type)
+HEIF_BRANDS = {b"heic", b"heix", b"hevc", b"hevx", b"heim", b"heis", b"mif1", b"msf1"}
+
+def is_supported_image(head: bytes) -> Optional[str]:
+    """Check the leading bytes of a file for a JPEG, PNG or HEIC/HEIF signature.
+    
+    Returns the file extension for the detected type ('.jpg', '.png' or '.heic'),
+    or None if the content is not a supported image.
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head[4:8] == b"ftyp" and head[8:12] in HEIF_BRANDS:
+        return ".heic"
+    return None
+
+@functools.lru_cache(maxsize=1)
 def get_local_ip():
     """Get the local IP address of this machine."""
     try:
-        # Use ifconfig to get actual network interfaces (works on macOS/Linux)
-        result = subprocess.run(
-            ["ifconfig"], 
-            capture_output=True, 
-            text=True, 
-            timeout=2
-        )
-        
-        # Parse ifconfig output for inet addresses
-        for line in result.stdout.split('\n'):
-            line = line.strip()
-            if line.startswith('inet '):
-                parts = line.split()
-                if len(parts) >= 2:
-                    ip = parts[1]
-                    # Return first 192.168.x.x address found
-                    if ip.startswith('192.168.'):
-                        return ip
-                    # Also accept 10.x.x.x or 172.16-31.x.x if no 192.168 found
-                    if ip.startswith('10.') or ip.startswith('172.'):
-                        # Store as fallback but keep looking for 192.168
-                        if 'fallback_ip' not in locals():
-                            fallback_ip = ip
-        
-        # Use fallback if we found one
-        if 'fallback_ip' in locals():
-            return fallback_ip
-            
+        # Resolve this host's own addresses; no subprocess or network traffic needed
+        addresses = {
+            info[4][0]
+            for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET)
+        }
+        # Prefer 192.168.x.x, then fall back to 10.x.x.x or 172.x.x.x
+        for prefixes in (('192.168.',), ('10.', '172.')):
+            for ip in sorted(addresses):
+                if ip.startswith(prefixes):
+                    return ip
     except Exception:
         pass
     
@@ -90,42 +100,62 @@ async def upload_photos(files: List[UploadFile] = File(...)):
     
     for file in files:
         try:
-            # Validate file type
-            if not file.content_type or not file.content_type.startswith('image/'):
+            # Validate file type from its magic bytes; browsers may send a wrong or generic content type
+            head = await file.read(16)
+            ext = is_supported_image(head)
+            if ext is None:
                 errors.append(f"{file.filename}: Not an image file")
                 continue
+            await file.seek(0)
             
-            # Generate unique filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            original_name = file.filename or "screenshot.jpg"
-            ext = Path(original_name).suffix or ".jpg"
-            new_filename = f"gym_{timestamp}{ext}"
+            # The extension follows the detected content, not the client-supplied name
+            original_name = file.filename or f"screenshot{ext}"
             
-            # Save file
-            save_path = UPLOAD_DIR / new_filename
-            content = await file.read()
-            
-            with open(save_path, "wb") as f:
-                f.write(content)
+            # Stream to a temporary file, hashing as we go so the final name is content-addressed
+            tmp_path = UPLOAD_DIR / f".upload_{uuid.uuid4().hex}.part"
+            digest = hashlib.blake2b(digest_size=8)
+            total = 0
+            try:
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                        total += len(chunk)
+                        if total > MAX_UPLOAD_SIZE:
+                            break
+                        digest.update(chunk)
+                        await f.write(chunk)
+                
+                if total > MAX_UPLOAD_SIZE:
+                    errors.append(f"{file.filename}: File exceeds {MAX_UPLOAD_SIZE // (1 << 20)} MB limit")
+                    continue
+                
+                new_filename = f"gym_{digest.hexdigest()}{ext}"
+                save_path = UPLOAD_DIR / new_filename
+                # Identical bytes were uploaded before (e.g. a retry), so keep the existing copy
+                deduped = save_path.exists()
+                if not deduped:
+                    os.replace(tmp_path, save_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
             
             uploaded_files.append({
                 "original": original_name,
                 "saved_as": new_filename,
-                "size": len(content)
+                "size": total,
+                "deduped": deduped
             })
-            log.info(f"✓ Uploaded: {new_filename} ({len(content)} bytes)")
+            log.info(f"✓ Uploaded: {new_filename} ({total} bytes{', duplicate' if deduped else ''})")
             
         except Exception as e:
             error_msg = f"{file.filename}: {str(e)}"
             errors.append(error_msg)
             log.error(f"✗ Upload failed: {error_msg}")
     
-    return JSONResponse({
+    return {
         "success": len(uploaded_files),
         "failed": len(errors),
         "files": uploaded_files,
         "errors": errors
-    })
+    }
 
 @app.get("/health")
 async def health_check():
@@ -133,15 +163,17 @@ async def health_check():
     return {
         "status": "ok",
         "upload_dir": str(UPLOAD_DIR.absolute()),
-        "total_files": len(list(UPLOAD_DIR.glob("*")))
+        # scandir counts entries without building a Path object for each one
+        "total_files": sum(1 for _ in os.scandir(UPLOAD_DIR))
     }
 
-def start_server(host: str = "0.0.0.0", port: int = 8000):
+def start_server(host: str = "0.0.0.0", port: int = 8000, workers: int = 1):
     """Start the web upload server.
     
     Args:
         host: Host to bind to (0.0.0.0 for all interfaces)
         port: Port number
+        workers: Number of worker processes (default: 1)
     """
     local_ip = get_local_ip()
     
@@ -158,7 +190,26 @@ def start_server(host: str = "0.0.0.0", port: int = 8000):
     log.info(f"")
     log.info(f"=" * 60)
     
-    uvicorn.run(app, host=host, port=port, log_level="warning")
+    # Multiple workers require the app as an import string, which only resolves
+    # when the package is installed; a single worker can serve the object directly
+    # (and works when this module or cli.py is run as a script).
+    target = "ai_gym_timetable_extractor.web_app:app" if workers > 1 else app
+    
+    # uvicorn picks uvloop and httptools on its own when installed (uvicorn[standard])
+    uvicorn.run(
+        target,
+        host=host,
+        port=port,
+        workers=workers,
+        log_level="warning"
+    )
+
+def main():
+    """Entry point for the gym-web script, where the package is installed.
+    
+    The import string resolves there, so serve with up to four worker processes.
+    """
+    start_server(workers=min(4, os.cpu_count() or 1))
 
 if __name__ == "__main__":
     start_server()
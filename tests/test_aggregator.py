@@ -0,0 +1,57 @@
+"""Tests for GymScheduleAggregator."""
+
+import json
+
+from ai_gym_timetable_extractor.aggregator import GymScheduleAggregator
+
+
+def write_schedule(path, activities):
+    path.write_text(json.dumps({"classes": [
+        {
+            "date": "2026-01-19",
+            "day_of_week": "Monday",
+            "timeslot": f"{hour:02d}:00",
+            "activity": activity,
+            "venue": "Studio A",
+            "class_type": "Group",
+            "vacancy": 5,
+        }
+        for hour, activity in enumerate(activities, start=7)
+    ]}))
+
+
+def test_classes_follow_sorted_file_order(tmp_path):
+    # Written out of order, and more files than a single parse would need
+    for i in reversed(range(40)):
+        write_schedule(tmp_path / f"shot{i:02d}.json", [f"Class {i}a", f"Class {i}b"])
+
+    classes = GymScheduleAggregator().aggregate_json_files(str(tmp_path))
+
+    assert [c.activity for c in classes] == [f"Class {i}{s}" for i in range(40) for s in "ab"]
+
+
+def test_unreadable_and_non_json_files_are_skipped(tmp_path):
+    write_schedule(tmp_path / "a.json", ["Yoga"])
+    (tmp_path / "b.json").write_text("{not json")
+    (tmp_path / "c.txt").write_text("ignored")
+    (tmp_path / "d.json").mkdir()
+    write_schedule(tmp_path / "e.json", ["Spin"])
+
+    classes = GymScheduleAggregator().aggregate_json_files(str(tmp_path))
+
+    assert [c.activity for c in classes] == ["Yoga", "Spin"]
+
+
+def test_missing_directory_yields_no_classes(tmp_path):
+    assert GymScheduleAggregator().aggregate_json_files(str(tmp_path / "missing")) == []
+
+
+def test_saved_json_round_trips(tmp_path):
+    write_schedule(tmp_path / "a.json", ["Yoga", "Spin"])
+    aggregator = GymScheduleAggregator()
+    classes = aggregator.aggregate_json_files(str(tmp_path))
+
+    output = tmp_path / "out" / "aggregated.json"
+    aggregator.save_aggregated_json(classes, str(output))
+
+    assert GymScheduleAggregator().aggregate_json_files(str(output.parent)) == classes
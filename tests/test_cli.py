@@ -0,0 +1,85 @@
+"""Tests for the batch extraction step of the CLI."""
+
+import threading
+import time
+
+import pytest
+
+from ai_gym_timetable_extractor import cli
+from ai_gym_timetable_extractor.constants import ENV_GEMINI_CONCURRENCY
+from ai_gym_timetable_extractor.ocr_engine import OcrEngine
+
+
+class FakeEngine(OcrEngine):
+    """Engine that tracks how many batches run at once.
+
+    A batch containing 'broken' raises, and an image named 'unreadable' fails on its own.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def extract_images_as_json(self, image_paths):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.05)
+            if any("broken" in path for path in image_paths):
+                raise RuntimeError("request failed")
+            return [
+                ValueError("cannot identify image") if "unreadable" in path else '{"classes": []}'
+                for path in image_paths
+            ]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(cli, "get_default_ocr_engine", lambda: engine)
+    monkeypatch.setattr(cli, "GEMINI_BATCH_SIZE", 1)
+    return engine
+
+
+def make_images(img_dir, names):
+    img_dir.mkdir()
+    for name in names:
+        (img_dir / name).write_bytes(b"\x89PNG\r\n\x1a\n")
+    (img_dir / "notes.txt").write_text("not an image")
+
+
+def test_batches_run_concurrently_up_to_the_limit(engine, tmp_path, monkeypatch):
+    monkeypatch.setenv(ENV_GEMINI_CONCURRENCY, "2")
+    make_images(tmp_path / "img", [f"shot{i}.png" for i in range(6)])
+
+    cli.batch_image_info_extraction(str(tmp_path / "img"), str(tmp_path / "json"))
+
+    assert engine.max_in_flight == 2
+    assert sorted(p.name for p in (tmp_path / "json").iterdir()) == [f"shot{i}.json" for i in range(6)]
+
+
+def test_failures_do_not_abort_other_images(engine, tmp_path, monkeypatch):
+    monkeypatch.setenv(ENV_GEMINI_CONCURRENCY, "4")
+    make_images(tmp_path / "img", ["a.png", "broken.png", "unreadable.jpg", "b.jpeg"])
+
+    cli.batch_image_info_extraction(str(tmp_path / "img"), str(tmp_path / "json"))
+
+    assert sorted(p.name for p in (tmp_path / "json").iterdir()) == ["a.json", "b.json"]
+
+
+@pytest.mark.parametrize("value, expected", [("3", 3), ("0", 1), ("-2", 1)])
+def test_gemini_concurrency_is_at_least_one(monkeypatch, value, expected):
+    monkeypatch.setenv(ENV_GEMINI_CONCURRENCY, value)
+    assert cli._gemini_concurrency() == expected
+
+
+def test_gemini_concurrency_rejects_non_integers(monkeypatch):
+    monkeypatch.setenv(ENV_GEMINI_CONCURRENCY, "many")
+    with pytest.raises(ValueError, match=ENV_GEMINI_CONCURRENCY):
+        cli._gemini_concurrency()
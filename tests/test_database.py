@@ -0,0 +1,167 @@
+"""Tests for GymScheduleDatabase."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from ai_gym_timetable_extractor.database import GymScheduleDatabase
+from ai_gym_timetable_extractor.models import GymClass
+
+
+def make_class(timeslot: str, activity: str, day_of_week: str = "Monday", vacancy: int = 5) -> GymClass:
+    return GymClass(
+        date="2026-01-19",
+        day_of_week=day_of_week,
+        timeslot=timeslot,
+        activity=activity,
+        venue="Studio A",
+        class_type="Group",
+        vacancy=vacancy,
+    )
+
+
+@pytest.fixture
+def db(tmp_path):
+    GymScheduleDatabase.reset_instance()
+    database = GymScheduleDatabase(db_path=tmp_path / "gym_schedule.db")
+    yield database
+    GymScheduleDatabase.reset_instance()
+
+
+@pytest.fixture
+def loaded_db(db):
+    db.load_delta([
+        make_class("07:00", "BodyPump"),
+        make_class("08:00", "Yoga"),
+        make_class("09:00", "Hot Yoga Flow", day_of_week="Tuesday"),
+        make_class("10:00", "Pilates"),
+    ])
+    return db
+
+
+def activities(classes):
+    return sorted(c.activity for c in classes)
+
+
+def test_each_thread_gets_its_own_connection(loaded_db):
+    seen = {}
+
+    def read(name):
+        seen[name] = (loaded_db._conn(), len(loaded_db.get_all_classes()))
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    connections = {id(conn) for conn, _ in seen.values()}
+    assert len(connections) == 4
+    assert loaded_db._conn() not in [conn for conn, _ in seen.values()]
+    assert all(count == 4 for _, count in seen.values())
+    assert loaded_db._conn() is loaded_db._conn()
+
+
+def test_concurrent_upserts_are_serialized(db):
+    def load(thread_no):
+        db.load_delta([make_class(f"{thread_no:02d}:{minute:02d}", "Spin") for minute in range(50)])
+
+    threads = [threading.Thread(target=load, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(db.get_all_classes()) == 8 * 50
+    assert not db._write_lock.locked()
+
+
+def test_upsert_rows_spans_several_executemany_batches(db, monkeypatch):
+    monkeypatch.setattr("ai_gym_timetable_extractor.database.UPSERT_BATCH_SIZE", 3)
+    rows = [
+        ("2026-01-19", "Monday", f"{i:02d}:00", "Spin", "Studio B", "Group", i, "2026-01-01T00:00:00")
+        for i in range(10)
+    ]
+
+    assert db._upsert_rows(rows) == 10
+    assert db.query("SELECT COUNT(*) FROM gym_classes")[0][0] == 10
+
+
+def test_activity_search_matches_substrings_case_insensitively(loaded_db):
+    assert activities(loaded_db.get_classes_by_activity("pump")) == ["BodyPump"]
+    assert activities(loaded_db.get_classes_by_activity("oga")) == ["Hot Yoga Flow", "Yoga"]
+    assert activities(loaded_db.get_classes_by_activity("YOGA FLOW")) == ["Hot Yoga Flow"]
+
+
+def test_short_activity_search_falls_back_to_like(loaded_db):
+    assert activities(loaded_db.get_classes_by_activity("yo")) == ["Hot Yoga Flow", "Yoga"]
+    assert loaded_db.get_classes_by_activity("%") == []
+
+
+def test_activity_search_escapes_query_syntax(loaded_db):
+    assert loaded_db.get_classes_by_activity('pump" OR "yoga') == []
+
+
+def test_day_of_week_is_case_insensitive(loaded_db):
+    assert activities(loaded_db.get_classes_by_day_of_week("monday")) == ["BodyPump", "Pilates", "Yoga"]
+    assert activities(loaded_db.get_classes_by_day_of_week("TUESDAY")) == ["Hot Yoga Flow"]
+
+
+def test_upsert_replaces_rows_and_keeps_fts_in_sync(loaded_db):
+    loaded_db.load_delta([make_class("07:00", "BodyPump", vacancy=0)])
+
+    pump = loaded_db.get_classes_by_activity("pump")
+    assert len(pump) == 1 and pump[0].vacancy == 0
+    assert len(loaded_db.get_all_classes()) == 4
+    loaded_db.query("INSERT INTO gym_classes_fts(gym_classes_fts) VALUES ('integrity-check')")
+
+
+def test_fts_follows_updates_and_deletes(loaded_db):
+    loaded_db.execute("UPDATE gym_classes SET activity = 'Spin' WHERE activity = 'Pilates'")
+    loaded_db.execute("DELETE FROM gym_classes WHERE activity = 'BodyPump'")
+
+    assert activities(loaded_db.get_classes_by_activity("spin")) == ["Spin"]
+    assert loaded_db.get_classes_by_activity("pilates") == []
+    assert loaded_db.get_classes_by_activity("pump") == []
+
+
+def test_word_tokenized_index_is_migrated_to_trigram(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE gym_classes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL, day_of_week TEXT NOT NULL, timeslot TEXT NOT NULL,
+            activity TEXT NOT NULL, venue TEXT NOT NULL, class_type TEXT NOT NULL,
+            vacancy INTEGER NOT NULL, modified_at TEXT NOT NULL,
+            UNIQUE(date, timeslot, activity)
+        );
+        CREATE VIRTUAL TABLE gym_classes_fts USING fts5(activity, content='gym_classes', content_rowid='id');
+        INSERT INTO gym_classes (date, day_of_week, timeslot, activity, venue, class_type, vacancy, modified_at)
+        VALUES ('2026-01-19', 'Monday', '07:00', 'BodyPump', 'Studio A', 'Group', 5, '2026-01-01T00:00:00');
+    """)
+    conn.close()
+
+    GymScheduleDatabase.reset_instance()
+    try:
+        db = GymScheduleDatabase(db_path=db_path)
+        assert activities(db.get_classes_by_activity("pump")) == ["BodyPump"]
+    finally:
+        GymScheduleDatabase.reset_instance()
+
+
+def test_load_delta_from_json_file(db, tmp_path):
+    json_path = tmp_path / "aggregated.json"
+    json_path.write_text(
+        '{"classes": [{"date": "2026-01-20", "day_of_week": "Tuesday", "timeslot": "18:00",'
+        ' "activity": "Spin", "venue": "Studio B", "class_type": "Group", "vacancy": "3"}]}'
+    )
+
+    assert db.load_delta_from_json_file(json_path) == 1
+    spin, = db.get_classes_by_activity("spin")
+    assert spin.vacancy == 3
+
+    json_path.write_text('{"schedules": []}')
+    with pytest.raises(ValueError):
+        db.load_delta_from_json_file(json_path)
@@ -0,0 +1,160 @@
+"""Tests for GeminiOcrEngine against a fake genai client."""
+
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors as genai_errors
+from PIL import Image
+
+from ai_gym_timetable_extractor import ocr_engine
+from ai_gym_timetable_extractor.models import GymClassWire, GymScheduleBatch, GymScheduleWire
+from ai_gym_timetable_extractor.constants import (
+    ENV_GEMINI_API_KEY,
+    ENV_GEMINI_MODEL_NAME,
+    ENV_OCR_CACHE_DIR,
+    ENV_OCR_CACHE_SKIP,
+    ENV_OCR_PRESERVE_ORIGINAL,
+)
+
+
+class FakeFiles:
+    """Stands in for client.files, handing out sequential upload names."""
+
+    def __init__(self):
+        self.uploads = 0
+
+    def upload(self, file, config):
+        self.uploads += 1
+        return SimpleNamespace(name=f"files/{self.uploads}")
+
+    def get(self, name):
+        return SimpleNamespace(name=name)
+
+
+class FakeModels:
+    """Stands in for client.models, answering each request with numbered schedules.
+    
+    batch_size overrides how many schedules a batched response holds, and batch_error
+    is raised instead of answering a batched request.
+    """
+
+    def __init__(self, batch_size=None, batch_error=None):
+        self.batch_size = batch_size
+        self.batch_error = batch_error
+        self.requests = []
+        self.schedules = 0
+
+    def _schedule(self):
+        self.schedules += 1
+        n = self.schedules
+        return GymScheduleWire(classes=[GymClassWire(
+            date="2026-01-19", day_of_week="Monday", timeslot="07:00",
+            activity=f"Class {n}", venue="Studio A", class_type="Group", vacancy=n,
+        )])
+
+    def generate_content(self, model, contents, config):
+        images = len(contents) - 1
+        self.requests.append(images)
+        if config["response_schema"] is GymScheduleWire:
+            return SimpleNamespace(parsed=self._schedule())
+        if self.batch_error is not None:
+            raise self.batch_error
+        return SimpleNamespace(parsed=GymScheduleBatch(
+            schedules=[self._schedule() for _ in range(self.batch_size or images)]
+        ))
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setenv(ENV_GEMINI_API_KEY, "test-key")
+    monkeypatch.setenv(ENV_GEMINI_MODEL_NAME, "fake-model")
+    monkeypatch.setenv(ENV_OCR_CACHE_DIR, str(cache))
+    monkeypatch.delenv(ENV_OCR_CACHE_SKIP, raising=False)
+    monkeypatch.delenv(ENV_OCR_PRESERVE_ORIGINAL, raising=False)
+    return cache
+
+
+@pytest.fixture
+def engine(cache_dir):
+    engine = ocr_engine.GeminiOcrEngine()
+    engine.client = SimpleNamespace(files=FakeFiles(), models=FakeModels())
+    return engine
+
+
+@pytest.fixture
+def screenshots(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"shot{i}.png"
+        buf = io.BytesIO()
+        Image.new("RGB", (1200 + i, 800), "white").save(buf, "PNG")
+        path.write_bytes(buf.getvalue())
+        paths.append(str(path))
+    return paths
+
+
+def vacancies(results):
+    return [json.loads(result)["classes"][0]["vacancy"] for result in results]
+
+
+def test_upload_reuses_cached_file_across_engines(engine, cache_dir):
+    first = engine._upload("a.png", "key", b"data", "image/png")
+
+    other = ocr_engine.GeminiOcrEngine()
+    other.client = engine.client
+    second = other._upload("a.png", "key", b"data", "image/png")
+
+    assert first.name == second.name == "files/1"
+    assert engine.client.files.uploads == 1
+
+
+def test_upload_survives_unwritable_cache_dir(engine, cache_dir):
+    cache_dir.write_text("a file where the cache directory should be")
+
+    assert engine._upload("a.png", "key", b"data", "image/png").name == "files/1"
+    assert engine._upload("a.png", "key", b"data", "image/png").name == "files/2"
+
+
+def test_batch_is_split_into_one_schedule_per_image(engine, screenshots):
+    results = engine.extract_images_as_json(screenshots)
+
+    assert engine.client.models.requests == [3]
+    assert vacancies(results) == [1, 2, 3]
+
+    # A second run is served from the result cache
+    assert engine.extract_images_as_json(screenshots) == results
+    assert engine.client.models.requests == [3]
+
+
+def test_schedule_count_mismatch_falls_back_to_single_requests(engine, screenshots):
+    engine.client.models.batch_size = 2
+
+    results = engine.extract_images_as_json(screenshots)
+
+    assert engine.client.models.requests == [3, 1, 1, 1]
+    assert vacancies(results) == [3, 4, 5]
+
+
+def test_api_error_falls_back_to_single_requests(engine, screenshots):
+    engine.client.models.batch_error = genai_errors.ServerError(503, {"error": {"status": "UNAVAILABLE"}})
+
+    results = engine.extract_images_as_json(screenshots)
+
+    assert engine.client.models.requests == [3, 1, 1, 1]
+    assert vacancies(results) == [1, 2, 3]
+
+
+def test_corrupt_image_does_not_fail_the_rest_of_the_batch(engine, screenshots, tmp_path):
+    corrupt = tmp_path / "corrupt.png"
+    corrupt.write_bytes(b"\x89PNG\r\n\x1a\ntruncated")
+    missing = str(tmp_path / "missing.png")
+
+    results = engine.extract_images_as_json([screenshots[0], str(corrupt), *screenshots[1:], missing])
+
+    assert engine.client.models.requests == [3]
+    assert isinstance(results[1], Exception)
+    assert isinstance(results[4], OSError)
+    assert vacancies([results[0], results[2], results[3]]) == [1, 2, 3]
@@ -0,0 +1,51 @@
+"""Tests for the schedule models."""
+
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from ai_gym_timetable_extractor.models import GymClass, GymClassWire, GymScheduleWire
+
+CLASS_FIELDS = {
+    "date": "2026-01-19",
+    "day_of_week": "Monday",
+    "timeslot": "07:00",
+    "activity": "BodyPump",
+    "venue": "Studio A",
+    "class_type": "Group",
+    "vacancy": 5,
+}
+
+
+def test_to_schedule_stamps_every_class_with_one_time():
+    wire = GymScheduleWire(classes=[
+        GymClassWire(**CLASS_FIELDS),
+        GymClassWire(**{**CLASS_FIELDS, "timeslot": "08:00"}),
+    ])
+    stamp = datetime(2026, 1, 1, 9, 30)
+
+    schedule = wire.to_schedule(modified_at=stamp)
+
+    assert [c.timeslot for c in schedule.classes] == ["07:00", "08:00"]
+    assert all(c.modified_at == stamp for c in schedule.classes)
+    assert schedule.classes[0].model_dump(exclude={"modified_at"}) == CLASS_FIELDS
+
+
+def test_to_schedule_defaults_to_now():
+    before = datetime.now()
+    schedule = GymScheduleWire(classes=[GymClassWire(**CLASS_FIELDS)]).to_schedule()
+
+    assert schedule.classes[0].modified_at >= before
+
+
+def test_only_the_wire_model_requires_iso_dates():
+    with pytest.raises(ValidationError):
+        GymClassWire(**{**CLASS_FIELDS, "date": "19/01/2026"})
+
+    assert GymClass(**{**CLASS_FIELDS, "date": "19/01/2026"}).date == "19/01/2026"
+
+
+def test_wire_schema_has_no_server_side_fields():
+    assert "modified_at" not in GymClassWire.model_json_schema()["properties"]
+    assert list(GymClass.model_fields) == [*CLASS_FIELDS, "modified_at"]
@@ -0,0 +1,84 @@
+"""Tests for the on-disk OCR result cache."""
+
+import pytest
+
+from ai_gym_timetable_extractor import ocr_engine
+from ai_gym_timetable_extractor.constants import (
+    ENV_OCR_CACHE_DIR,
+    ENV_OCR_CACHE_SKIP,
+    ENV_OCR_PRESERVE_ORIGINAL,
+)
+
+
+class FakeEngine(ocr_engine.OcrEngine):
+    """Engine that counts extractions instead of calling an API."""
+
+    def __init__(self, model_name: str = "fake-model"):
+        super().__init__()
+        self.model_name = model_name
+        self.calls = 0
+
+    @ocr_engine.cache_by_image_content
+    def extract_image_as_json(self, image_path, image=None):
+        self.calls += 1
+        return f'{{"call": {self.calls}}}'
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setenv(ENV_OCR_CACHE_DIR, str(cache))
+    monkeypatch.delenv(ENV_OCR_CACHE_SKIP, raising=False)
+    monkeypatch.delenv(ENV_OCR_PRESERVE_ORIGINAL, raising=False)
+    return cache
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "screenshot.png"
+    path.write_bytes(b"\x89PNG\r\n\x1a\nfirst")
+    return path
+
+
+def test_second_call_is_served_from_cache(image):
+    engine = FakeEngine()
+
+    assert engine.extract_image_as_json(str(image)) == '{"call": 1}'
+    assert engine.extract_image_as_json(str(image)) == '{"call": 1}'
+    assert engine.calls == 1
+
+
+def test_cache_key_follows_content_model_and_variant(image, monkeypatch):
+    engine = FakeEngine()
+    engine.extract_image_as_json(str(image))
+
+    image.write_bytes(b"\x89PNG\r\n\x1a\nsecond")
+    engine.extract_image_as_json(str(image))
+    assert engine.calls == 2
+
+    other = FakeEngine(model_name="other-model")
+    other.extract_image_as_json(str(image))
+    assert other.calls == 1
+
+    monkeypatch.setenv(ENV_OCR_PRESERVE_ORIGINAL, "1")
+    engine.extract_image_as_json(str(image))
+    assert engine.calls == 3
+
+
+def test_force_and_skip_env_refresh_the_entry(image, monkeypatch):
+    engine = FakeEngine()
+    engine.extract_image_as_json(str(image))
+
+    assert engine.extract_image_as_json(str(image), force=True) == '{"call": 2}'
+    assert engine.extract_image_as_json(str(image)) == '{"call": 2}'
+
+    monkeypatch.setenv(ENV_OCR_CACHE_SKIP, "1")
+    assert engine.extract_image_as_json(str(image)) == '{"call": 3}'
+
+
+def test_unwritable_cache_still_returns_result(image, cache_dir):
+    cache_dir.write_text("a file where the cache directory should be")
+    engine = FakeEngine()
+
+    assert engine.extract_image_as_json(str(image)) == '{"call": 1}'
+    assert engine.extract_image_as_json(str(image)) == '{"call": 2}'
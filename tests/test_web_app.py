@@ -0,0 +1,69 @@
+"""Tests for the upload web app."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ai_gym_timetable_extractor import web_app
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 32
+
+
+@pytest.mark.parametrize("head, ext", [
+    (PNG[:16], ".png"),
+    (JPEG[:16], ".jpg"),
+    (b"\x00\x00\x00\x18ftypheic\x00\x00\x00\x00", ".heic"),
+    (b"\x00\x00\x00\x1cftypmif1\x00\x00\x00\x00", ".heic"),
+])
+def test_is_supported_image_detects_known_signatures(head, ext):
+    assert web_app.is_supported_image(head) == ext
+
+
+@pytest.mark.parametrize("head", [
+    b"",
+    b"GIF89a" + b"\x00" * 10,
+    b"\x00\x00\x00\x18ftypisom\x00\x00\x00\x00",  # MP4
+    b"not an image at all",
+])
+def test_is_supported_image_rejects_other_content(head):
+    assert web_app.is_supported_image(head) is None
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(web_app, "UPLOAD_DIR", tmp_path)
+    return TestClient(web_app.app)
+
+
+def test_upload_dedupes_identical_content(client, tmp_path):
+    first = client.post("/upload", files=[("files", ("a.png", PNG, "image/png"))]).json()
+    second = client.post("/upload", files=[("files", ("b.png", PNG, "application/octet-stream"))]).json()
+
+    assert first["success"] == second["success"] == 1
+    assert first["files"][0]["deduped"] is False
+    assert second["files"][0]["deduped"] is True
+    assert first["files"][0]["saved_as"] == second["files"][0]["saved_as"]
+    assert [p.name for p in tmp_path.iterdir()] == [first["files"][0]["saved_as"]]
+
+
+def test_upload_keeps_distinct_content_and_rejects_non_images(client, tmp_path):
+    result = client.post("/upload", files=[
+        ("files", ("a.png", PNG, "image/png")),
+        ("files", ("b.jpg", JPEG, "image/jpeg")),
+        ("files", ("notes.txt", b"hello", "image/png")),
+    ]).json()
+
+    assert result["success"] == 2
+    assert result["failed"] == 1
+    assert "notes.txt" in result["errors"][0]
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".jpg", ".png"]
+
+
+def test_upload_extension_follows_detected_content(client, tmp_path):
+    result = client.post("/upload", files=[
+        ("files", ("photo", PNG, "image/png")),
+        ("files", ("x.html", JPEG, "text/html")),
+    ]).json()
+
+    assert [f["saved_as"][-4:] for f in result["files"]] == [".png", ".jpg"]
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".jpg", ".png"]